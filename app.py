@@ -4,21 +4,62 @@ Hebocon Tournament Server
 Ein einfacher Flask-Server für die Hebocon-Turnier-Steuerung
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g
+import bisect
+import copy
+import difflib
+import functools
+import gzip
+import hashlib
 import json
 import os
+import re
+import shutil
+import threading
+import unicodedata
 import uuid
 from datetime import datetime
+from urllib.parse import urlparse
 import time
 
+try:
+    import brotli  # optional, pip install brotli
+except ImportError:
+    brotli = None
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+
 app = Flask(__name__)
+sock = Sock(app) if Sock else None
 
 # Daten-Datei
 DATA_FILE = 'tournament_data.json'
 
+# Archiv abgeschlossener Turniere
+ARCHIVE_DIR = 'archive'
+ARCHIVE_FILE = os.path.join(ARCHIVE_DIR, 'tournaments.jsonl.gz')
+ARCHIVE_INDEX_FILE = os.path.join(ARCHIVE_DIR, 'index.jsonl')
+
+# Wird bei jedem Speichern erhöht - gecachte GET-Antworten werden damit ungültig
+_state_generation = 0
+
+# Zähler für /metrics
+_metrics = {
+    'state_writes': 0,
+    'coalesced_requests': 0,
+    'rate_limited_requests': 0,
+    'rate_limited_by_client': {},
+    'archive_failures': 0
+}
+
 # Standard-Daten
 DEFAULT_DATA = {
-    'robots': [],
+    'robots': [],  # Namen in Reihenfolge, gespiegelt aus robot_registry
+    'robot_registry': {},  # robot_id -> {'id', 'name', 'team', 'weight_class', 'photo', 'created_at'}
     'current_match': {
         'robot1': '',
         'robot2': '',
@@ -61,13 +102,57 @@ def load_data():
                 return json.load(f)
         except:
             pass
-    return DEFAULT_DATA.copy()
+    return copy.deepcopy(DEFAULT_DATA)
+
+def validate_data(data):
+    """Fehlende Bereiche mit Standardwerten auffüllen
 
-def save_data(data):
-    """Daten in JSON-Datei speichern"""
+    Returns (data, repaired) - repaired ist True, wenn etwas ergänzt wurde.
+    """
+    repaired = False
+    if not isinstance(data, dict):
+        return copy.deepcopy(DEFAULT_DATA), True
+    
+    for key, default in DEFAULT_DATA.items():
+        if key not in data or not isinstance(data[key], type(default)):
+            data[key] = copy.deepcopy(default)
+            repaired = True
+        elif isinstance(default, dict):
+            for sub_key, sub_default in default.items():
+                if sub_key not in data[key]:
+                    data[key][sub_key] = copy.deepcopy(sub_default)
+                    repaired = True
+    
+    return data, repaired
+
+def save_data(data, broadcast=True):
+    """Daten in JSON-Datei speichern und an verbundene Overlays senden"""
+    global _state_generation
     data['last_updated'] = datetime.now().isoformat()
     with open(DATA_FILE, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    _state_generation += 1
+    _metrics['state_writes'] += 1
+    _clear_state_errors()
+    if broadcast:
+        broadcast_state(data)
+
+# Alle Schreibzugriffe (load, ändern, save) laufen unter diesem Lock - HTTP
+# über die Hooks unten, WebSocket-Befehle in handle_ws_command()
+_state_lock = threading.RLock()
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+@app.before_request
+def lock_state_for_writes():
+    """Serialize state-changing requests so no update is lost"""
+    if request.method in WRITE_METHODS:
+        _state_lock.acquire()
+        g.state_locked = True
+
+@app.teardown_request
+def unlock_state(exc):
+    if g.pop('state_locked', False):
+        _state_lock.release()
 
 def create_empty_bracket():
     """Create empty 16-participant tournament bracket"""
@@ -237,18 +322,676 @@ def get_next_match(bracket):
     
     return None, None
 
+# Robot registry
+# data['robots'] stays the ordered list of names that the pages and the
+# bracket use; data['robot_registry'] holds one record per robot with a
+# stable ID and metadata. Names are compared in normalized form (case,
+# accents, spaces and punctuation ignored), so "Wackel-Bot 3000" and
+# "wackelbot3000" count as the same robot.
+ROBOT_METADATA_FIELDS = ['team', 'weight_class', 'photo']
+ROBOT_SIMILARITY_THRESHOLD = 0.85
+ROBOT_SEARCH_LIMIT = 10
+ROBOT_FUZZY_CUTOFF = 0.7
+
+_registry_index_cache = {'key': None, 'index': None}
+
+def normalize_robot_name(name):
+    """Normalized form of a robot name used for duplicate checks and search"""
+    decomposed = unicodedata.normalize('NFKD', str(name).casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return re.sub(r'[\W_]+', '', stripped)
+
+def _new_robot_record(name, metadata=None):
+    metadata = metadata or {}
+    record = {'id': str(uuid.uuid4()), 'name': name, 'created_at': datetime.now().isoformat()}
+    for field in ROBOT_METADATA_FIELDS:
+        record[field] = metadata.get(field)
+    return record
+
+def sync_robot_registry(data):
+    """Bring registry and robots list in line
+
+    Names in data['robots'] without a record (legacy data, test data) get
+    one, records whose name is no longer listed are dropped. Existing records
+    keep their ID. Returns True if the registry changed.
+    """
+    registry = data.setdefault('robot_registry', {})
+    robots = data.setdefault('robots', [])
+    by_name = {record['name']: robot_id for robot_id, record in registry.items()}
+    
+    synced = {}
+    for name in robots:
+        if name in by_name:
+            synced[by_name[name]] = registry[by_name[name]]
+        else:
+            record = _new_robot_record(name)
+            synced[record['id']] = record
+    
+    changed = list(synced) != list(registry)
+    data['robot_registry'] = synced
+    return changed
+
+def load_robot_data():
+    """load_data() with the registry in sync
+
+    IDs created by the sync are saved right away, otherwise every request
+    would hand out new ones for the same robot.
+    """
+    with _state_lock:
+        data = load_data()
+        if sync_robot_registry(data):
+            save_data(data)
+    return data
+
+def get_registry_index(data):
+    """Lookup tables for the registry, rebuilt only when the roster changes"""
+    registry = data.get('robot_registry', {})
+    key = tuple((robot_id, record['name']) for robot_id, record in registry.items())
+    if _registry_index_cache['key'] == key:
+        return _registry_index_cache['index']
+    
+    by_normalized = {}
+    for robot_id, record in registry.items():
+        by_normalized.setdefault(normalize_robot_name(record['name']), robot_id)
+    
+    index = {
+        'by_name': {record['name']: robot_id for robot_id, record in registry.items()},
+        'by_normalized': by_normalized,
+        'sorted_normalized': sorted(by_normalized)
+    }
+    _registry_index_cache['key'] = key
+    _registry_index_cache['index'] = index
+    return index
+
+def resolve_robot(data, name_or_id):
+    """Find a robot record by exact name or ID"""
+    registry = data.get('robot_registry', {})
+    if name_or_id in registry:
+        return registry[name_or_id]
+    robot_id = get_registry_index(data)['by_name'].get(name_or_id)
+    return registry.get(robot_id) if robot_id else None
+
+def find_duplicate_robot(data, name):
+    """Record whose normalized name equals the given name's, if any"""
+    robot_id = get_registry_index(data)['by_normalized'].get(normalize_robot_name(name))
+    return data['robot_registry'].get(robot_id) if robot_id else None
+
+def find_similar_robots(data, name, limit=ROBOT_SEARCH_LIMIT):
+    """Records with a similar (not necessarily equal) normalized name"""
+    index = get_registry_index(data)
+    matches = difflib.get_close_matches(normalize_robot_name(name), index['sorted_normalized'],
+                                        n=limit, cutoff=ROBOT_SIMILARITY_THRESHOLD)
+    return [data['robot_registry'][index['by_normalized'][m]] for m in matches]
+
+def search_robots(data, query, limit=ROBOT_SEARCH_LIMIT):
+    """Prefix matches first, then substring matches, then fuzzy matches"""
+    index = get_registry_index(data)
+    sorted_normalized = index['sorted_normalized']
+    needle = normalize_robot_name(query)
+    if not needle:
+        return []
+    
+    found = []
+    # Prefix matches form a contiguous run in the sorted list
+    start = bisect.bisect_left(sorted_normalized, needle)
+    for normalized in sorted_normalized[start:]:
+        if not normalized.startswith(needle) or len(found) >= limit:
+            break
+        found.append(normalized)
+    
+    if len(found) < limit:
+        found.extend(n for n in sorted_normalized
+                     if needle in n and n not in found)
+        found = found[:limit]
+    
+    if len(found) < limit:
+        # Typo-tolerant: compare against the name's prefix of the same length
+        matcher = difflib.SequenceMatcher(b=needle)
+        scored = []
+        for normalized in sorted_normalized:
+            if normalized in found:
+                continue
+            matcher.set_seq1(normalized[:len(needle)])
+            ratio = matcher.ratio()
+            if ratio >= ROBOT_FUZZY_CUTOFF:
+                scored.append((-ratio, normalized))
+        found.extend(normalized for _, normalized in sorted(scored)[:limit - len(found)])
+    
+    return [data['robot_registry'][index['by_normalized'][n]] for n in found]
+
+# Tournament archive
+# Each completed tournament is appended to ARCHIVE_FILE as its own gzip
+# member, so a single event can be read back by offset without decompressing
+# the rest. ARCHIVE_INDEX_FILE holds one small JSON line per archived event
+# (title, date, placements, match results) and is all the query endpoints
+# ever read. Both files are append-only; a re-archived tournament (e.g. after
+# undoing the final) supersedes its earlier index line.
+ROUND_PLACEMENTS = {
+    'round1': 'round1',
+    'quarterfinals': 'quarterfinalist',
+    'semifinals': 'semifinalist',
+    'finals': 'finalist'
+}
+
+_archive_lock = threading.Lock()
+_archive_index = None  # tournament_id -> index entry, in archive order
+_archive_by_robot = {}  # normalize_robot_name() -> [tournament_id, ...]
+
+def _archive_key(name):
+    """Case-insensitive lookup key for titles
+
+    Robot names use normalize_robot_name(), like the robot registry.
+    """
+    return ' '.join(str(name).split()).casefold()
+
+def _build_archive_entry(data):
+    """Summarize a completed tournament for the archive index"""
+    bracket = data['bracket']
+    results = []
+    placements = {}
+    
+    for match_id, match in bracket['matches'].items():
+        if not match.get('completed'):
+            continue
+        results.append({
+            'match_id': match_id,
+            'round': match['round'],
+            'robot1': match['robot1'],
+            'robot2': match['robot2'],
+            'winner': match['winner']
+        })
+        loser = match['robot2'] if match['winner'] == match['robot1'] else match['robot1']
+        placements[loser] = ROUND_PLACEMENTS.get(match['round'], match['round'])
+    
+    final = bracket['matches']['final']
+    placements[final['winner']] = 'champion'
+    
+    return {
+        'tournament_id': bracket.get('tournament_id') or str(uuid.uuid4()),
+        'title': data.get('tournament_settings', {}).get('title', ''),
+        'archived_at': datetime.now().isoformat(),
+        'champion': final['winner'],
+        'final': {'robot1': final['robot1'], 'robot2': final['robot2'], 'winner': final['winner']},
+        'placements': placements,
+        'results': results,
+        'fingerprint': hashlib.sha256(
+            json.dumps(bracket['matches'], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    }
+
+def _index_archive_entry(entry):
+    """Add an index entry to the in-memory lookups (caller holds _archive_lock)"""
+    tournament_id = entry['tournament_id']
+    previous = _archive_index.pop(tournament_id, None)
+    if previous:
+        for key in {normalize_robot_name(robot) for robot in previous['placements']}:
+            ids = _archive_by_robot.get(key, [])
+            if tournament_id in ids:
+                ids.remove(tournament_id)
+    
+    _archive_index[tournament_id] = entry
+    # Two robots can share a normalized name ("Bot-1", "bot1") - list the tournament once
+    for key in {normalize_robot_name(robot) for robot in entry['placements']}:
+        _archive_by_robot.setdefault(key, []).append(tournament_id)
+
+def load_archive_index():
+    """Read the archive index file into memory"""
+    global _archive_index
+    with _archive_lock:
+        _archive_index = {}
+        _archive_by_robot.clear()
+        if os.path.exists(ARCHIVE_INDEX_FILE):
+            with open(ARCHIVE_INDEX_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        _index_archive_entry(json.loads(line))
+                    except (ValueError, KeyError):
+                        # Truncated line from an interrupted write
+                        continue
+    return _archive_index
+
+def _get_archive_index():
+    if _archive_index is None:
+        load_archive_index()
+    return _archive_index
+
+def archive_tournament(data):
+    """Append the tournament to the archive if its final has been decided
+
+    Returns the index entry, or None if there was nothing (new) to archive.
+    """
+    final = data.get('bracket', {}).get('matches', {}).get('final')
+    if not final or not final.get('completed'):
+        return None
+    
+    entry = _build_archive_entry(data)
+    _get_archive_index()
+    
+    with _archive_lock:
+        existing = _archive_index.get(entry['tournament_id'])
+        if existing and existing['fingerprint'] == entry['fingerprint']:
+            return None
+        
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        record = gzip.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        with open(ARCHIVE_FILE, 'ab') as f:
+            entry['offset'] = f.tell()
+            entry['length'] = len(record)
+            f.write(record)
+        with open(ARCHIVE_INDEX_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        
+        _index_archive_entry(entry)
+    return entry
+
+def try_archive_tournament(data):
+    """Archive without failing the operator action
+
+    Errors are logged and counted in /metrics instead of being raised.
+    """
+    try:
+        return archive_tournament(data)
+    except Exception:
+        _metrics['archive_failures'] += 1
+        app.logger.exception('Archiving tournament failed')
+        return None
+
+def _archive_entries(robot=None):
+    """Consistent snapshot of index entries in archive order, optionally for one robot
+
+    Re-archiving moves entries around, so the lookups are only read under the lock.
+    """
+    _get_archive_index()
+    with _archive_lock:
+        if robot is None:
+            return list(_archive_index.values())
+        return [_archive_index[t] for t in _archive_by_robot.get(normalize_robot_name(robot), [])]
+
+def read_archived_tournament(tournament_id):
+    """Load a single archived tournament's full state"""
+    _get_archive_index()
+    with _archive_lock:
+        entry = _archive_index.get(tournament_id)
+    if not entry:
+        return None
+    with open(ARCHIVE_FILE, 'rb') as f:
+        f.seek(entry['offset'])
+        return json.loads(gzip.decompress(f.read(entry['length'])))
+
+def _public_archive_entry(entry):
+    """Index entry without storage details"""
+    return {k: v for k, v in entry.items() if k not in ('offset', 'length', 'fingerprint')}
+
+# Startup warm-up
+# control.html and overlay.html contain no template variables, so they are
+# rendered once at startup and served from memory afterwards.
+STATIC_TEMPLATES = ['control.html', 'overlay.html']
+
+# Compression: static pages are compressed once at warm-up with the highest
+# level, dynamic JSON on the fly with a cheap level and only above a minimum
+# size - small payloads gain nothing on the wire but still cost CPU.
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 5
+COMPRESS_MIMETYPES = ['application/json']
+
+_static_pages = {}
+_startup_status = {
+    'ready': False,
+    'started_at': None,
+    'warmup_ms': None,
+    'state_repaired': False,
+    'errors': []
+}
+
+def _supported_encodings():
+    """Content-Encodings in server preference order"""
+    return (['br'] if brotli else []) + ['gzip']
+
+def _compress(body, encoding, level):
+    """Compress body with the given Content-Encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(level + 2, 11))
+    return gzip.compress(body, compresslevel=min(level, 9), mtime=0)
+
+def _negotiate_encoding():
+    """Pick the best encoding from the client's Accept-Encoding header"""
+    return request.accept_encodings.best_match(_supported_encodings())
+
+def _render_static_page(template_name):
+    """Render a static template once and keep all encodings in memory"""
+    with app.app_context():
+        body = render_template(template_name).encode('utf-8')
+    
+    page = {
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'identity': body
+    }
+    for encoding in _supported_encodings():
+        page[encoding] = _compress(body, encoding, 9)
+    
+    _static_pages[template_name] = page
+    return page
+
+def _static_page_response(template_name):
+    """Serve a pre-rendered page with cache headers and ETag"""
+    page = _static_pages.get(template_name)
+    if page is None or app.debug or app.config.get('TEMPLATES_AUTO_RELOAD'):
+        # Warm-up failed or was skipped, or templates are being edited
+        # (the debug reloader only watches .py files) - render now
+        page = _render_static_page(template_name)
+    
+    encoding = _negotiate_encoding() or 'identity'
+    response = app.response_class(page[encoding], mimetype='text/html')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    # Always revalidate - cheap via ETag/304, and clients pick up new page JS
+    # right after a server upgrade
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    # Each encoding is a different representation and needs its own ETag
+    response.set_etag(f"{page['etag']}-{encoding}")
+    return response.make_conditional(request)
+
+@app.after_request
+def compress_response(response):
+    """Compress larger JSON responses if the client accepts it"""
+    if (response.status_code != 200 or
+        response.direct_passthrough or
+        'Content-Encoding' in response.headers or
+        response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+    
+    response.set_data(_compress(body, encoding, COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Rate limiting and poll coalescing
+# Overlays poll several GET endpoints every second. A stuck tab or a
+# misconfigured OBS scene can do that much faster, so GET requests under
+# /api/ are limited with token buckets, and identical GETs within
+# COALESCE_WINDOW share one computed response. Every request is charged;
+# a shared response costs only COALESCE_HIT_COST. Two buckets apply: one
+# per tab (remote address plus the X-Client-Id header the pages send) so
+# several browser sources on the streaming PC don't share a limit, and one
+# per remote address on top, so rotating the header or reloading a page
+# doesn't buy a fresh allowance. Operator POSTs are never limited.
+RATE_LIMIT_RATE = 20           # tokens per second and tab
+RATE_LIMIT_BURST = 40
+RATE_LIMIT_ADDRESS_RATE = 60   # tokens per second and remote address
+RATE_LIMIT_ADDRESS_BURST = 120
+RATE_LIMIT_MAX_CLIENTS = 1000  # buckets kept in memory
+RATE_LIMIT_MAX_METRIC_CLIENTS = 100
+COALESCE_WINDOW = 0.25         # seconds
+COALESCE_HIT_COST = 0.25       # tokens
+
+_rate_buckets = {}
+_rate_lock = threading.Lock()
+_coalesce_cache = {}
+_coalesce_locks = {}
+_coalesce_guard = threading.Lock()
+
+def _evict_rate_buckets(now):
+    """Keep at most RATE_LIMIT_MAX_CLIENTS buckets, least recently used go first"""
+    # Buckets that have refilled completely carry no state
+    for key in [k for k, b in _rate_buckets.items() if b['tokens'] + (now - b['updated']) * b['rate'] >= b['burst']]:
+        del _rate_buckets[key]
+    
+    overflow = len(_rate_buckets) - RATE_LIMIT_MAX_CLIENTS + 1
+    if overflow > 0:
+        # Drop a batch, so a client rotating IDs doesn't make every request sort
+        oldest = sorted(_rate_buckets, key=lambda k: _rate_buckets[k]['updated'])
+        for key in oldest[:max(overflow, RATE_LIMIT_MAX_CLIENTS // 10)]:
+            del _rate_buckets[key]
+
+def _take_token(key, rate, burst, cost=1):
+    """Take tokens from a bucket, False if there are not enough"""
+    now = time.monotonic()
+    with _rate_lock:
+        if key not in _rate_buckets and len(_rate_buckets) >= RATE_LIMIT_MAX_CLIENTS:
+            _evict_rate_buckets(now)
+        
+        bucket = _rate_buckets.setdefault(key, {'tokens': burst, 'updated': now,
+                                                'rate': rate, 'burst': burst})
+        bucket['tokens'] = min(burst, bucket['tokens'] + (now - bucket['updated']) * rate)
+        bucket['updated'] = now
+        
+        if bucket['tokens'] < cost:
+            return False
+        bucket['tokens'] -= cost
+        return True
+
+def _record_rejection(address):
+    """Count a rejection per address - label count is capped for /metrics"""
+    _metrics['rate_limited_requests'] += 1
+    by_client = _metrics['rate_limited_by_client']
+    if address not in by_client and len(by_client) >= RATE_LIMIT_MAX_METRIC_CLIENTS:
+        address = 'other'
+    by_client[address] = by_client.get(address, 0) + 1
+
+def _rate_limited_response(cost=1):
+    """Charge the current client, returns a 429 response if it is over its limit"""
+    address = request.remote_addr or 'unknown'
+    client_id = re.sub(r'[^A-Za-z0-9_-]', '', request.headers.get('X-Client-Id', ''))[:64]
+    
+    if (_take_token(('address', address), RATE_LIMIT_ADDRESS_RATE, RATE_LIMIT_ADDRESS_BURST, cost) and
+        _take_token(('tab', address, client_id), RATE_LIMIT_RATE, RATE_LIMIT_BURST, cost)):
+        return None
+    
+    _record_rejection(address)
+    response = jsonify({'success': False, 'message': 'Too many requests'})
+    response.status_code = 429
+    response.headers['Retry-After'] = '1'
+    return response
+
+@app.before_request
+def rate_limit():
+    """Reject polling clients that exceed their token bucket"""
+    if request.method != 'GET' or not request.path.startswith('/api/'):
+        return None
+    
+    # Coalesced endpoints charge inside coalesce_get, depending on hit or miss
+    view = app.view_functions.get(request.endpoint)
+    if getattr(view, 'coalesced', False):
+        return None
+    
+    return _rate_limited_response()
+
+def _coalesced_response(entry):
+    """Build a response from a coalesce entry
+
+    Compressed variants are kept in the entry, so a hit does no compression
+    work; compress_response() skips responses that already have an encoding.
+    """
+    body = entry['body']
+    encoding = None
+    if len(body) >= COMPRESS_MIN_SIZE and entry['mimetype'] in COMPRESS_MIMETYPES:
+        encoding = _negotiate_encoding()
+    if encoding:
+        if encoding not in entry['variants']:
+            entry['variants'][encoding] = _compress(body, encoding, COMPRESS_LEVEL)
+        body = entry['variants'][encoding]
+    
+    response = app.response_class(body, status=entry['status'], mimetype=entry['mimetype'])
+    response.vary.add('Accept-Encoding')
+    # Lets the overlay drop a poll that is older than a WebSocket push
+    response.headers['X-State-Version'] = str(entry['version'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def coalesce_get(view):
+    """Share one response between identical GETs within COALESCE_WINDOW
+
+    Concurrent requests wait for the first one to finish computing. Cached
+    responses are dropped as soon as the state is saved. Entries are keyed by
+    path - the coalesced endpoints take no query parameters, so a
+    cache-busting query string can't grow the cache.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        
+        key = request.path
+        with _coalesce_guard:
+            lock = _coalesce_locks.setdefault(key, threading.Lock())
+        
+        with lock:
+            entry = _coalesce_cache.get(key)
+            hit = (entry and entry['generation'] == _state_generation and
+                   time.monotonic() - entry['time'] < COALESCE_WINDOW)
+            
+            limited = _rate_limited_response(COALESCE_HIT_COST if hit else 1)
+            if limited:
+                return limited
+            
+            if hit:
+                _metrics['coalesced_requests'] += 1
+                response = _coalesced_response(entry)
+                response.headers['X-Coalesced'] = '1'
+                return response
+            
+            # Read before the view loads the state - a save in between makes
+            # this response look older, never newer than it is
+            version = _state_generation
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            
+            # Generation is read after the view ran, so a save done by
+            # the view itself (e.g. winner animation reset) is included
+            entry = {
+                'body': response.get_data(),
+                'status': response.status_code,
+                'mimetype': response.mimetype,
+                'variants': {},
+                'version': version,
+                'generation': _state_generation,
+                'time': time.monotonic()
+            }
+            _coalesce_cache[key] = entry
+            return _coalesced_response(entry)
+    
+    wrapper.coalesced = True
+    return wrapper
+
+def _clear_state_errors():
+    """A valid state file has been written - drop warm-up state errors"""
+    errors = [e for e in _startup_status['errors'] if not e.startswith('state:')]
+    if len(errors) != len(_startup_status['errors']):
+        _startup_status['errors'] = errors
+        _startup_status['ready'] = not errors
+
+def _read_state_file():
+    """Parse the state file strictly - load_data() falls back to defaults
+
+    Returns (data, error). A file that cannot be parsed is copied to a
+    timestamped backup first, because the next save overwrites it.
+    """
+    if not os.path.exists(DATA_FILE):
+        return copy.deepcopy(DEFAULT_DATA), None
+    try:
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+    except ValueError as e:
+        backup = f"{DATA_FILE}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        shutil.copyfile(DATA_FILE, backup)
+        return None, f'{DATA_FILE} is not valid JSON ({e}), backup saved as {backup}'
+
+def warm_up(persist=True):
+    """Preload and validate state, pre-render static templates
+
+    With persist=False repairs are only reported, not written back.
+    """
+    start = time.perf_counter()
+    _startup_status['ready'] = False
+    _startup_status['errors'] = []
+    
+    # State laden und prüfen
+    try:
+        data, error = _read_state_file()
+        if error:
+            _startup_status['errors'].append(f'state: {error}')
+        else:
+            data, repaired = validate_data(data)
+            repaired = sync_robot_registry(data) or repaired
+            if persist and (repaired or not os.path.exists(DATA_FILE)):
+                save_data(data)
+            _startup_status['state_repaired'] = repaired
+    except Exception as e:
+        _startup_status['errors'].append(f'state: {e}')
+    
+    # Archiv-Index laden
+    try:
+        load_archive_index()
+    except Exception as e:
+        _startup_status['errors'].append(f'archive: {e}')
+    
+    # Statische Templates vorrendern
+    for template_name in STATIC_TEMPLATES:
+        try:
+            _render_static_page(template_name)
+        except Exception as e:
+            _startup_status['errors'].append(f'{template_name}: {e}')
+    
+    _startup_status['started_at'] = datetime.now().isoformat()
+    _startup_status['warmup_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    _startup_status['ready'] = not _startup_status['errors']
+    return _startup_status['ready']
+
 # Routes
 @app.route('/')
 def control_panel():
     """Steuerungs-Interface"""
-    return render_template('control.html')
+    return _static_page_response('control.html')
 
 @app.route('/overlay')
 def overlay():
     """OBS Overlay"""
-    return render_template('overlay.html')
+    return _static_page_response('overlay.html')
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe - 503 until warm-up has completed"""
+    status = dict(_startup_status)
+    status['templates'] = sorted(_static_pages)
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def metrics():
+    """Server counters in Prometheus text format"""
+    lines = [
+        '# HELP hebocon_state_writes_total Number of writes to the state file',
+        '# TYPE hebocon_state_writes_total counter',
+        f"hebocon_state_writes_total {_metrics['state_writes']}",
+        '# HELP hebocon_archive_failures_total Tournaments that could not be archived',
+        '# TYPE hebocon_archive_failures_total counter',
+        f"hebocon_archive_failures_total {_metrics['archive_failures']}",
+        '# HELP hebocon_requests_coalesced_total GET requests answered from a shared response',
+        '# TYPE hebocon_requests_coalesced_total counter',
+        f"hebocon_requests_coalesced_total {_metrics['coalesced_requests']}",
+        '# HELP hebocon_requests_rate_limited_total GET requests rejected by the rate limiter',
+        '# TYPE hebocon_requests_rate_limited_total counter',
+        f"hebocon_requests_rate_limited_total {_metrics['rate_limited_requests']}",
+        '# HELP hebocon_requests_rate_limited_by_client_total Rejected GET requests per client',
+        '# TYPE hebocon_requests_rate_limited_by_client_total counter'
+    ]
+    for client, count in sorted(_metrics['rate_limited_by_client'].items()):
+        lines.append(f'hebocon_requests_rate_limited_by_client_total{{client="{client}"}} {count}')
+    
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/data')
+@coalesce_get
 def get_data():
     """Aktuelle Daten als JSON"""
     data = load_data()
@@ -263,10 +1006,12 @@ def get_data():
         
         # If more than 8 seconds have passed, reset the animation
         if current_time - animation_time >= 8:
-            data['winner_animation']['winner'] = None
-            data['winner_animation']['animation_state'] = 'normal'
-            data['winner_animation']['animation_timestamp'] = None
-            save_data(data)
+            # Reload under the write lock - skip if the winner was announced again meanwhile
+            with _state_lock:
+                data = load_data()
+                if data.get('winner_animation', {}).get('animation_timestamp') == animation_time:
+                    apply_winner_reset(data, {})
+                    save_data(data)
     
     return jsonify(data)
 
@@ -276,23 +1021,78 @@ def handle_robots():
     data = load_data()
     
     if request.method == 'POST':
-        new_robot = request.json.get('name', '').strip()
-        if new_robot and new_robot not in data['robots']:
-            data['robots'].append(new_robot)
+        request_data = request.json or {}
+        new_robot = request_data.get('name', '').strip()
+        if not new_robot:
+            return jsonify({'success': False, 'message': 'Roboter bereits vorhanden oder ungültiger Name'})
+        
+        if sync_robot_registry(data):
             save_data(data)
-            return jsonify({'success': True, 'message': f'Roboter "{new_robot}" hinzugefügt'})
-        return jsonify({'success': False, 'message': 'Roboter bereits vorhanden oder ungültiger Name'})
+        duplicate = find_duplicate_robot(data, new_robot)
+        if duplicate:
+            return jsonify({
+                'success': False,
+                'message': f'Roboter bereits vorhanden ("{duplicate["name"]}")',
+                'duplicate': duplicate
+            })
+        
+        similar = find_similar_robots(data, new_robot)
+        record = _new_robot_record(new_robot, request_data)
+        data['robot_registry'][record['id']] = record
+        data['robots'].append(new_robot)
+        save_data(data)
+        return jsonify({
+            'success': True,
+            'message': f'Roboter "{new_robot}" hinzugefügt',
+            'robot': record,
+            'similar': similar
+        })
     
     return jsonify(data['robots'])
 
+@app.route('/api/robots/registry', methods=['GET'])
+def get_robot_registry():
+    """Alle Roboter mit ID und Metadaten"""
+    data = load_robot_data()
+    return jsonify(list(data['robot_registry'].values()))
+
+@app.route('/api/robots/registry/<robot_id>', methods=['POST'])
+def update_robot_metadata(robot_id):
+    """Metadaten eines Roboters ändern (team, weight_class, photo)"""
+    data = load_robot_data()
+    
+    record = data['robot_registry'].get(robot_id)
+    if not record:
+        return jsonify({'success': False, 'message': 'Roboter nicht gefunden'})
+    
+    request_data = request.json or {}
+    for field in ROBOT_METADATA_FIELDS:
+        if field in request_data:
+            record[field] = request_data[field]
+    
+    save_data(data)
+    return jsonify({'success': True, 'robot': record})
+
+@app.route('/api/robots/search', methods=['GET'])
+def handle_robot_search():
+    """Roboter per Präfix-/Fuzzy-Suche finden"""
+    data = load_robot_data()
+    
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', ROBOT_SEARCH_LIMIT, type=int)
+    return jsonify(search_robots(data, query, max(limit, 0)))
+
 @app.route('/api/robots/<robot_name>', methods=['DELETE'])
 def delete_robot(robot_name):
-    """Roboter löschen"""
-    data = load_data()
-    if robot_name in data['robots']:
-        data['robots'].remove(robot_name)
+    """Roboter löschen (per Name oder ID)"""
+    data = load_robot_data()
+    
+    record = resolve_robot(data, robot_name)
+    if record:
+        del data['robot_registry'][record['id']]
+        data['robots'].remove(record['name'])
         save_data(data)
-        return jsonify({'success': True, 'message': f'Roboter "{robot_name}" gelöscht'})
+        return jsonify({'success': True, 'message': f'Roboter "{record["name"]}" gelöscht'})
     return jsonify({'success': False, 'message': 'Roboter nicht gefunden'})
 
 @app.route('/api/match', methods=['GET', 'POST'])
@@ -317,6 +1117,7 @@ def handle_match():
 @app.route('/api/reset', methods=['POST'])
 def reset_data():
     """Alle Daten zurücksetzen"""
+    try_archive_tournament(load_data())
     save_data(DEFAULT_DATA.copy())
     return jsonify({'success': True, 'message': 'Daten zurückgesetzt'})
 
@@ -333,6 +1134,7 @@ def generate_test_robots():
     data = load_data()
     # Clear existing robots and add test robots
     data['robots'] = test_robots.copy()
+    sync_robot_registry(data)
     save_data(data)
     
     return jsonify({
@@ -343,6 +1145,7 @@ def generate_test_robots():
 
 # Bracket API Endpoints
 @app.route('/api/bracket', methods=['GET'])
+@coalesce_get
 def get_bracket():
     """Get complete tournament bracket"""
     data = load_data()
@@ -354,6 +1157,9 @@ def setup_bracket():
     data = load_data()
     request_data = request.json or {}
     
+    # Archive a finished tournament before it is replaced
+    try_archive_tournament(data)
+    
     # Create empty bracket
     bracket = create_empty_bracket()
     
@@ -398,6 +1204,8 @@ def update_match_result(match_id):
             }
         
         save_data(data)
+        if match_id == 'final':
+            try_archive_tournament(data)
         return jsonify({'success': True, 'message': message, 'bracket': bracket})
     else:
         return jsonify({'success': False, 'message': message})
@@ -485,8 +1293,12 @@ def assign_robot_to_position():
     if position not in [f'pos_{i}' for i in range(1, 17)]:
         return jsonify({'success': False, 'message': 'Invalid position'})
     
-    if robot not in data.get('robots', []):
+    if sync_robot_registry(data):
+        save_data(data)
+    record = resolve_robot(data, robot)
+    if not record:
         return jsonify({'success': False, 'message': 'Robot not found'})
+    robot = record['name']
     
     bracket = data['bracket']
     
@@ -567,7 +1379,19 @@ def start_tournament():
     
     return jsonify({'success': True, 'message': 'Tournament started!', 'bracket': bracket})
 
+def apply_overlay_mode(data, request_data):
+    """Set overlay display mode"""
+    if 'overlay_settings' not in data:
+        data['overlay_settings'] = {'display_mode': 'match'}
+    
+    mode = request_data.get('mode')
+    if mode in ['match', 'bracket']:
+        data['overlay_settings']['display_mode'] = mode
+        return {'success': True, 'mode': mode}
+    return {'success': False, 'message': 'Invalid mode. Use "match" or "bracket"'}
+
 @app.route('/api/overlay/mode', methods=['GET', 'POST'])
+@coalesce_get
 def overlay_display_mode():
     """Get/set overlay display mode"""
     data = load_data()
@@ -576,15 +1400,10 @@ def overlay_display_mode():
         data['overlay_settings'] = {'display_mode': 'match'}
     
     if request.method == 'POST':
-        request_data = request.json or {}
-        mode = request_data.get('mode')
-        
-        if mode in ['match', 'bracket']:
-            data['overlay_settings']['display_mode'] = mode
+        result = apply_overlay_mode(data, request.json or {})
+        if result['success']:
             save_data(data)
-            return jsonify({'success': True, 'mode': mode})
-        else:
-            return jsonify({'success': False, 'message': 'Invalid mode. Use "match" or "bracket"'})
+        return jsonify(result)
     
     return jsonify({'mode': data['overlay_settings'].get('display_mode', 'match')})
 
@@ -592,6 +1411,7 @@ def overlay_display_mode():
 def reset_bracket():
     """Reset tournament bracket"""
     data = load_data()
+    try_archive_tournament(data)
     data['bracket'] = {
         'tournament_id': None,
         'status': 'not_setup',
@@ -603,12 +1423,71 @@ def reset_bracket():
     save_data(data)
     return jsonify({'success': True, 'message': 'Tournament bracket reset'})
 
-# Timer API Endpoints
-@app.route('/api/timer', methods=['GET', 'POST'])
-def handle_timer():
-    """Get/set timer state"""
-    data = load_data()
+# Archive API Endpoints
+@app.route('/api/archive', methods=['GET'])
+def list_archive():
+    """List archived tournaments, newest first
+
+    Optional filters: title, robot, date (YYYY-MM-DD or prefix), limit
+    """
+    entries = _archive_entries(request.args.get('robot') or None)
     
+    title = request.args.get('title')
+    if title:
+        entries = [e for e in entries if _archive_key(title) in _archive_key(e['title'])]
+    
+    date = request.args.get('date')
+    if date:
+        entries = [e for e in entries if e['archived_at'].startswith(date)]
+    
+    entries.reverse()
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        entries = entries[:max(limit, 0)]
+    
+    return jsonify([_public_archive_entry(e) for e in entries])
+
+@app.route('/api/archive/robot/<robot_name>', methods=['GET'])
+def archive_robot_results(robot_name):
+    """All archived results of one robot"""
+    key = normalize_robot_name(robot_name)
+    
+    tournaments = []
+    for entry in reversed(_archive_entries(robot_name)):
+        robots = [r for r in entry['placements'] if normalize_robot_name(r) == key]
+        tournaments.append({
+            'tournament_id': entry['tournament_id'],
+            'title': entry['title'],
+            'archived_at': entry['archived_at'],
+            'placement': entry['placements'][robots[0]],
+            'matches': [m for m in entry['results'] if m['robot1'] in robots or m['robot2'] in robots]
+        })
+    
+    return jsonify({'robot': robot_name, 'tournaments': tournaments})
+
+@app.route('/api/archive/finals', methods=['GET'])
+def archive_finals():
+    """Last finals, newest first (limit defaults to 10)"""
+    limit = request.args.get('limit', 10, type=int)
+    entries = _archive_entries()[::-1][:max(limit, 0)]
+    return jsonify([{
+        'tournament_id': e['tournament_id'],
+        'title': e['title'],
+        'archived_at': e['archived_at'],
+        'final': e['final']
+    } for e in entries])
+
+@app.route('/api/archive/<tournament_id>', methods=['GET'])
+def get_archived_tournament(tournament_id):
+    """Full state of one archived tournament"""
+    archived = read_archived_tournament(tournament_id)
+    if archived is None:
+        return jsonify({'success': False, 'message': 'Tournament not found in archive'}), 404
+    return jsonify(archived)
+
+# Timer API Endpoints
+def _ensure_timer(data):
+    """Make sure the timer section exists with all fields"""
     if 'timer' not in data:
         data['timer'] = {
             'duration': 180,
@@ -621,101 +1500,116 @@ def handle_timer():
     # Ensure elapsed_time exists for existing timers
     if 'elapsed_time' not in data['timer']:
         data['timer']['elapsed_time'] = 0
+
+def apply_timer_command(data, request_data):
+    """Apply a timer action and/or duration change"""
+    _ensure_timer(data)
     
-    if request.method == 'POST':
-        request_data = request.json or {}
-        
-        if 'duration' in request_data:
-            data['timer']['duration'] = int(request_data['duration'])
+    if 'duration' in request_data:
+        data['timer']['duration'] = int(request_data['duration'])
+    
+    if 'action' in request_data:
+        action = request_data['action']
         
-        if 'action' in request_data:
-            action = request_data['action']
-            
-            if action == 'start':
-                if data['timer']['is_paused']:
-                    # Resume from pause - restart timer with remaining time
-                    data['timer']['start_time'] = time.time()
-                else:
-                    # Fresh start
-                    data['timer']['start_time'] = time.time()
-                    data['timer']['elapsed_time'] = 0
-                data['timer']['is_running'] = True
-                data['timer']['is_paused'] = False
-            elif action == 'stop':
-                data['timer']['start_time'] = None
-                data['timer']['elapsed_time'] = 0
-                data['timer']['is_running'] = False
-                data['timer']['is_paused'] = False
-            elif action == 'pause':
-                if data['timer']['is_running'] and data['timer']['start_time']:
-                    # Calculate elapsed time up to now
-                    current_elapsed = time.time() - data['timer']['start_time']
-                    data['timer']['elapsed_time'] += current_elapsed
-                data['timer']['is_paused'] = True
-                data['timer']['is_running'] = False
-                data['timer']['start_time'] = None
-            elif action == 'reset':
-                data['timer']['start_time'] = None
+        if action == 'start':
+            if data['timer']['is_paused']:
+                # Resume from pause - restart timer with remaining time
+                data['timer']['start_time'] = time.time()
+            else:
+                # Fresh start
+                data['timer']['start_time'] = time.time()
                 data['timer']['elapsed_time'] = 0
-                data['timer']['is_running'] = False
-                data['timer']['is_paused'] = False
-        
+            data['timer']['is_running'] = True
+            data['timer']['is_paused'] = False
+        elif action == 'stop':
+            data['timer']['start_time'] = None
+            data['timer']['elapsed_time'] = 0
+            data['timer']['is_running'] = False
+            data['timer']['is_paused'] = False
+        elif action == 'pause':
+            if data['timer']['is_running'] and data['timer']['start_time']:
+                # Calculate elapsed time up to now
+                current_elapsed = time.time() - data['timer']['start_time']
+                data['timer']['elapsed_time'] += current_elapsed
+            data['timer']['is_paused'] = True
+            data['timer']['is_running'] = False
+            data['timer']['start_time'] = None
+        elif action == 'reset':
+            data['timer']['start_time'] = None
+            data['timer']['elapsed_time'] = 0
+            data['timer']['is_running'] = False
+            data['timer']['is_paused'] = False
+    
+    return {'success': True, 'timer': get_timer_status(data['timer'])}
+
+@app.route('/api/timer', methods=['GET', 'POST'])
+@coalesce_get
+def handle_timer():
+    """Get/set timer state"""
+    data = load_data()
+    _ensure_timer(data)
+    
+    if request.method == 'POST':
+        result = apply_timer_command(data, request.json or {})
         save_data(data)
-        return jsonify({'success': True, 'timer': get_timer_status(data['timer'])})
+        return jsonify(result)
     
     return jsonify(get_timer_status(data['timer']))
 
 # Winner Animation API Endpoints
-@app.route('/api/winner', methods=['POST'])
-def set_winner():
-    """Set match winner and trigger animation"""
-    data = load_data()
-    request_data = request.json or {}
-    
-    winner_robot = request_data.get('winner')  # 'robot1' or 'robot2'
-    
-    if winner_robot not in ['robot1', 'robot2']:
-        return jsonify({'success': False, 'message': 'Invalid winner. Must be robot1 or robot2'})
-    
-    # Ensure winner_animation exists
+def _ensure_winner_animation(data):
+    """Make sure the winner animation section exists"""
     if 'winner_animation' not in data:
         data['winner_animation'] = {
             'winner': None,
             'animation_state': 'normal',
             'animation_timestamp': None
         }
+
+def apply_winner(data, request_data):
+    """Set match winner and trigger animation"""
+    winner_robot = request_data.get('winner')  # 'robot1' or 'robot2'
+    
+    if winner_robot not in ['robot1', 'robot2']:
+        return {'success': False, 'message': 'Invalid winner. Must be robot1 or robot2'}
+    
+    _ensure_winner_animation(data)
     
     # Update winner animation data
     data['winner_animation']['winner'] = winner_robot
     data['winner_animation']['animation_state'] = 'winner_announced'
     data['winner_animation']['animation_timestamp'] = time.time()
     
-    save_data(data)
-    return jsonify({
-        'success': True, 
+    return {
+        'success': True,
         'winner': winner_robot,
         'animation_state': 'winner_announced'
-    })
+    }
+
+def apply_winner_reset(data, request_data):
+    """Reset winner animation state"""
+    _ensure_winner_animation(data)
+    data['winner_animation']['winner'] = None
+    data['winner_animation']['animation_state'] = 'normal'
+    data['winner_animation']['animation_timestamp'] = None
+    return {'success': True}
+
+@app.route('/api/winner', methods=['POST'])
+def set_winner():
+    """Set match winner and trigger animation"""
+    data = load_data()
+    result = apply_winner(data, request.json or {})
+    if result['success']:
+        save_data(data)
+    return jsonify(result)
 
 @app.route('/api/winner/reset', methods=['POST'])
 def reset_winner_animation():
     """Reset winner animation state"""
     data = load_data()
-    
-    # Ensure winner_animation exists
-    if 'winner_animation' not in data:
-        data['winner_animation'] = {
-            'winner': None,
-            'animation_state': 'normal',
-            'animation_timestamp': None
-        }
-    else:
-        data['winner_animation']['winner'] = None
-        data['winner_animation']['animation_state'] = 'normal'
-        data['winner_animation']['animation_timestamp'] = None
-    
+    result = apply_winner_reset(data, {})
     save_data(data)
-    return jsonify({'success': True})
+    return jsonify(result)
 
 @app.route('/api/tournament/title', methods=['GET', 'POST'])
 def handle_tournament_title():
@@ -775,6 +1669,179 @@ def get_timer_status(timer_data):
         'elapsed_time': timer_data['elapsed_time']
     }
 
+# WebSocket control channel
+# Overlays connect to /ws and receive every saved state right away instead
+# of waiting for their next poll. The control panel connects with
+# ?role=control and sends operator commands over the same socket; they are
+# applied with the same functions as the HTTP endpoints, acknowledged with
+# the new state version and then pushed to all overlays. Polling keeps
+# working as a fallback (and without flask-sock installed).
+#
+# Every subscriber has its own writer thread that always sends the latest
+# state only, so a frozen OBS source or a half-open Wi-Fi connection never
+# blocks the request that saved the state. A subscriber stuck in one send
+# for longer than WS_SEND_TIMEOUT is dropped.
+WS_COMMANDS = {
+    'timer': apply_timer_command,
+    'winner': apply_winner,
+    'winner_reset': apply_winner_reset,
+    'overlay_mode': apply_overlay_mode
+}
+WS_SEND_TIMEOUT = 5       # seconds
+WS_RECEIVE_TIMEOUT = 1    # seconds, how often a dropped client is noticed
+
+_ws_subscribers = []
+_ws_lock = threading.Lock()
+
+def _ws_send(client, message):
+    """Send to one client, False if the connection is gone"""
+    try:
+        with client['lock']:
+            client['ws'].send(message)
+        return True
+    except Exception:
+        return False
+
+def _ws_drop(client):
+    """Stop pushing to a subscriber, its handler closes the socket"""
+    with client['cond']:
+        client['closed'] = True
+        client['cond'].notify()
+    with _ws_lock:
+        if client in _ws_subscribers:
+            _ws_subscribers.remove(client)
+
+def _ws_writer(client):
+    """Send the latest pending state to one subscriber"""
+    while True:
+        with client['cond']:
+            while client['pending'] is None and not client['closed']:
+                client['cond'].wait()
+            if client['closed']:
+                return
+            message, client['pending'] = client['pending'], None
+            client['sending_since'] = time.monotonic()
+        
+        sent = _ws_send(client, message)
+        client['sending_since'] = None
+        if not sent:
+            _ws_drop(client)
+            return
+
+def _state_message(data):
+    return json.dumps({
+        'type': 'state',
+        'version': _state_generation,
+        'data': data,
+        'timer': get_timer_status(data.get('timer', DEFAULT_DATA['timer']))
+    }, ensure_ascii=False)
+
+def broadcast_state(data):
+    """Queue the state for all subscribed overlays - never blocks on a socket"""
+    with _ws_lock:
+        subscribers = list(_ws_subscribers)
+    if not subscribers:
+        return
+    
+    # Serialize once for all clients
+    message = _state_message(data)
+    now = time.monotonic()
+    for client in subscribers:
+        sending_since = client['sending_since']
+        if sending_since and now - sending_since > WS_SEND_TIMEOUT:
+            _ws_drop(client)
+            continue
+        with client['cond']:
+            # An older unsent state is simply replaced
+            client['pending'] = message
+            client['cond'].notify()
+
+def _ws_ack(message_id, success, **fields):
+    return dict({'type': 'ack', 'id': message_id, 'success': success}, **fields)
+
+def handle_ws_command(message):
+    """Apply an operator command, returns (ack, data or None)"""
+    message_id = message.get('id')
+    handler = WS_COMMANDS.get(message.get('action'))
+    if not handler:
+        return _ws_ack(message_id, False, message='Unknown action'), None
+    
+    payload = message.get('payload') or {}
+    if not isinstance(payload, dict):
+        return _ws_ack(message_id, False, message='Payload must be an object'), None
+    
+    with _state_lock:
+        data = load_data()
+        try:
+            result = handler(data, payload)
+        except Exception as e:
+            # Invalid values (e.g. a non-numeric duration) must not close the socket
+            return _ws_ack(message_id, False, message=f'Invalid command: {e}'), None
+        
+        if result.get('success'):
+            save_data(data, broadcast=False)
+        else:
+            data = None
+        version = _state_generation
+    
+    return _ws_ack(message_id, result.get('success', False), version=version, result=result), data
+
+if sock:
+    @app.before_request
+    def check_websocket_origin():
+        """Only accept sockets opened by our own pages
+
+        Browsers don't apply the same-origin policy to WebSockets, so without
+        this any web page could send operator commands.
+        """
+        if request.path != '/ws':
+            return None
+        origin = request.headers.get('Origin')
+        if origin and urlparse(origin).netloc != request.host:
+            return jsonify({'success': False, 'message': 'Origin not allowed'}), 403
+        return None
+    
+    @sock.route('/ws')
+    def control_channel(ws):
+        """Bidirectional channel for overlays and the control panel"""
+        client = {'ws': ws, 'lock': threading.Lock(), 'cond': threading.Condition(),
+                  'pending': None, 'closed': False, 'sending_since': None}
+        if request.args.get('role') != 'control':
+            client['pending'] = _state_message(load_data())
+            threading.Thread(target=_ws_writer, args=(client,), daemon=True).start()
+            with _ws_lock:
+                _ws_subscribers.append(client)
+        
+        try:
+            while not client['closed']:
+                raw = ws.receive(timeout=WS_RECEIVE_TIMEOUT)
+                if raw is None:
+                    continue
+                
+                try:
+                    message = json.loads(raw)
+                except (TypeError, ValueError):
+                    message = None
+                if not isinstance(message, dict):
+                    _ws_send(client, json.dumps({'type': 'error', 'message': 'Expected a JSON object'}))
+                    continue
+                
+                if message.get('type') == 'command':
+                    ack, data = handle_ws_command(message)
+                    _ws_send(client, json.dumps(ack, ensure_ascii=False))
+                    if data is not None:
+                        broadcast_state(data)
+                elif message.get('type') == 'ping':
+                    _ws_send(client, json.dumps({'type': 'pong', 'version': _state_generation}))
+        except ConnectionClosed:
+            pass
+        finally:
+            _ws_drop(client)
+
+# Warm-up beim Import, damit auch WSGI-Server sofort bereit sind.
+# Reparaturen am State nur beim Serverstart schreiben, nicht bei jedem Import.
+warm_up(persist=__name__ == '__main__')
+
 if __name__ == '__main__':
     # Template-Ordner erstellen falls nicht vorhanden
     os.makedirs('templates', exist_ok=True)
@@ -784,6 +1851,7 @@ if __name__ == '__main__':
     print("Steuerung:    http://localhost:5005")
     print("OBS Overlay:  http://localhost:5005/overlay")
     print("API Daten:    http://localhost:5005/api/data")
+    print("Health:       http://localhost:5005/healthz")
     print("=" * 40)
     
     app.run(debug=True, host='0.0.0.0', port=5005)
@@ -22,6 +22,121 @@ test.describe('API Validation', () => {
     }
   });
 
+  test('health endpoint reports readiness after warm-up', async ({ request }) => {
+    const response = await request.get('/healthz');
+    expect(response.ok()).toBeTruthy();
+    
+    const status = await response.json();
+    expect(status.ready).toBeTruthy();
+    expect(status.templates).toContain('overlay.html');
+    
+    // Pre-rendered pages are always revalidated
+    const overlay = await request.get('/overlay');
+    expect(overlay.headers()['cache-control']).toBe('no-cache');
+  });
+
+  test('templates are served compressed and revalidate via ETag', async ({ request }) => {
+    const response = await request.get('/overlay', {
+      headers: { 'Accept-Encoding': 'gzip' }
+    });
+    expect(response.ok()).toBeTruthy();
+    expect(response.headers()['content-encoding']).toBe('gzip');
+    
+    const etag = response.headers()['etag'];
+    expect(etag).toBeDefined();
+    
+    const revalidated = await request.get('/overlay', {
+      headers: { 'Accept-Encoding': 'gzip', 'If-None-Match': etag }
+    });
+    expect(revalidated.status()).toBe(304);
+  });
+
+  test('rate limiter rejects a client that exceeds its bucket', async ({ request }) => {
+    const headers = { 'X-Client-Id': 'rate-limit-test' };
+    const statuses = [];
+    for (let i = 0; i < 60; i++) {
+      const response = await request.get('/api/robots', { headers });
+      statuses.push(response.status());
+    }
+    expect(statuses).toContain(429);
+    
+    // Other clients are not affected
+    const other = await request.get('/api/robots', { headers: { 'X-Client-Id': 'rate-limit-other' } });
+    expect(other.ok()).toBeTruthy();
+  });
+
+  test('identical polls within the window share one response', async ({ request }) => {
+    const headers = { 'X-Client-Id': 'coalescing-test' };
+    await request.get('/api/overlay/mode', { headers });
+    const second = await request.get('/api/overlay/mode', { headers });
+    expect(second.ok()).toBeTruthy();
+    expect(second.headers()['x-coalesced']).toBe('1');
+  });
+
+  test('metrics endpoint exposes rate limiting counters', async ({ request }) => {
+    const response = await request.get('/metrics');
+    expect(response.ok()).toBeTruthy();
+    
+    const body = await response.text();
+    expect(body).toContain('hebocon_requests_rate_limited_total');
+    expect(body).toContain('hebocon_requests_coalesced_total');
+  });
+
+  test('archive query endpoints respond', async ({ request }) => {
+    const finals = await request.get('/api/archive/finals?limit=10');
+    expect(finals.ok()).toBeTruthy();
+    expect(Array.isArray(await finals.json())).toBeTruthy();
+    
+    const robotResults = await request.get('/api/archive/robot/Wackel-Bot%203000');
+    expect(robotResults.ok()).toBeTruthy();
+    expect(Array.isArray((await robotResults.json()).tournaments)).toBeTruthy();
+    
+    const missing = await request.get('/api/archive/does-not-exist');
+    expect(missing.status()).toBe(404);
+  });
+
+  test('completed tournament is archived and re-archived after undo', async ({ request }) => {
+    await request.post('/api/robots/generate-test-data');
+    const robots = await (await request.get('/api/robots')).json();
+    
+    const setup = await (await request.post('/api/bracket/setup', { data: { robots: robots } })).json();
+    const tournamentId = setup.bracket.tournament_id;
+    
+    // Play the bracket to the end, robot1 always wins
+    const matchOrder = [
+      'r1_m1', 'r1_m2', 'r1_m3', 'r1_m4', 'r1_m5', 'r1_m6', 'r1_m7', 'r1_m8',
+      'qf_m1', 'qf_m2', 'qf_m3', 'qf_m4', 'sf_m1', 'sf_m2', 'final'
+    ];
+    let bracket = setup.bracket;
+    for (const matchId of matchOrder) {
+      const result = await (await request.post(`/api/bracket/match/${matchId}`, {
+        data: { winner: bracket.matches[matchId].robot1 }
+      })).json();
+      expect(result.success).toBeTruthy();
+      bracket = result.bracket;
+    }
+    const finalMatch = bracket.matches.final;
+    
+    const finals = await (await request.get('/api/archive/finals?limit=1')).json();
+    expect(finals[0].tournament_id).toBe(tournamentId);
+    expect(finals[0].final.winner).toBe(finalMatch.robot1);
+    
+    const champion = await (await request.get(`/api/archive/robot/${encodeURIComponent(finalMatch.robot1)}`)).json();
+    const entry = champion.tournaments.find(t => t.tournament_id === tournamentId);
+    expect(entry.placement).toBe('champion');
+    expect(entry.matches.length).toBe(4);
+    
+    // Undo the final and let the other finalist win
+    await request.post('/api/bracket/match/final/undo');
+    await request.post('/api/bracket/match/final', { data: { winner: finalMatch.robot2 } });
+    
+    const rearchived = await (await request.get('/api/archive/finals?limit=1')).json();
+    expect(rearchived[0].final.winner).toBe(finalMatch.robot2);
+    
+    const all = await (await request.get('/api/archive')).json();
+    expect(all.filter(t => t.tournament_id === tournamentId).length).toBe(1);
+  });
+
   test('robot generation API works correctly', async ({ request }) => {
     // Test robot generation endpoint
     const response = await request.post('/api/robots/generate-test-data');
@@ -56,6 +171,25 @@ test.describe('API Validation', () => {
     expect(hasTestRobot).toBeTruthy();
   });
 
+  test('robot registry rejects near-duplicates and supports search', async ({ request }) => {
+    await request.post('/api/robots/generate-test-data');
+    
+    // Normalized name equals "Wackel-Bot 3000"
+    const duplicate = await request.post('/api/robots', {
+      data: { name: 'wackelbot3000' }
+    });
+    const duplicateResult = await duplicate.json();
+    expect(duplicateResult.success).toBeFalsy();
+    expect(duplicateResult.duplicate.name).toBe('Wackel-Bot 3000');
+    
+    const search = await request.get('/api/robots/search?q=wobl');
+    expect(search.ok()).toBeTruthy();
+    
+    const matches = await search.json();
+    expect(matches.some(robot => robot.name === 'Wobble-Warrior')).toBeTruthy();
+    expect(matches[0].id).toBeDefined();
+  });
+
   test('timer API responds correctly', async ({ request }) => {
     // Get timer status
     const response = await request.get('/api/timer');
@@ -23,6 +23,57 @@ test.describe('Core Tournament Functionality', () => {
     await page.screenshot({ path: 'test-results/title-update.png', fullPage: true });
   });
 
+  test('overlay receives state pushes over the control channel', async ({ page, request }) => {
+    const socketPromise = page.waitForEvent('websocket');
+    await page.goto('/overlay');
+    
+    const socket = await socketPromise;
+    expect(socket.url()).toContain('/ws');
+    
+    const pushed = socket.waitForEvent('framereceived', {
+      predicate: frame => frame.payload.includes('"display_mode": "bracket"')
+    });
+    await request.post('/api/overlay/mode', { data: { mode: 'bracket' } });
+    await pushed;
+    
+    await request.post('/api/overlay/mode', { data: { mode: 'match' } });
+  });
+
+  test('operator command over the control channel is acknowledged and pushed', async ({ page }) => {
+    const socketPromise = page.waitForEvent('websocket');
+    await page.goto('/overlay');
+    const overlaySocket = await socketPromise;
+    
+    const pushed = overlaySocket.waitForEvent('framereceived', {
+      predicate: frame => frame.payload.includes('"display_mode": "bracket"')
+    });
+    
+    // Act as the control panel from the same origin
+    const ack = await page.evaluate(() => new Promise((resolve, reject) => {
+      const socket = new WebSocket(`ws://${location.host}/ws?role=control`);
+      socket.onopen = () => socket.send(JSON.stringify({
+        type: 'command', id: 1, action: 'overlay_mode', payload: { mode: 'bracket' }
+      }));
+      socket.onmessage = event => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'ack') {
+          socket.close();
+          resolve(message);
+        }
+      };
+      socket.onerror = () => reject(new Error('control socket failed'));
+    }));
+    
+    expect(ack.success).toBeTruthy();
+    expect(ack.result.mode).toBe('bracket');
+    expect(ack.version).toBeGreaterThan(0);
+    
+    const frame = await pushed;
+    expect(JSON.parse(frame.payload).version).toBeGreaterThanOrEqual(ack.version);
+    
+    await page.request.post('/api/overlay/mode', { data: { mode: 'match' } });
+  });
+
   test('winner animation can be triggered', async ({ page }) => {
     await page.goto('/');
     await page.waitForLoadState('networkidle');